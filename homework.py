@@ -1,18 +1,46 @@
+import json
 import logging
 import os
+import random
+import signal
 import sys
+import threading
 import time
+from collections import deque
 from http import HTTPStatus
+from logging.handlers import RotatingFileHandler
 
+import orjson
 import requests
 from dotenv import load_dotenv
-from telegram import Bot
+from requests.adapters import HTTPAdapter
+from telegram import Update
+from telegram.constants import MAX_MESSAGE_LENGTH
+from telegram.error import BadRequest, NetworkError, RetryAfter
+from telegram.ext import (CallbackContext, CommandHandler, Filters,
+                          Updater)
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
+LOG_FILE = 'bot.log'
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+file_handler = RotatingFileHandler(
+    LOG_FILE,
+    maxBytes=LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT,
+    encoding='utf-8',
+    delay=True
+)
+stream_handler = logging.StreamHandler()
+stream_handler.setLevel(logging.WARNING)
+
 logging.basicConfig(
     format='%(asctime)s - %(funcName)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+    level=logging.INFO,
+    handlers=(file_handler, stream_handler)
 )
 
 logger = logging.getLogger(__name__)
@@ -24,8 +52,16 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 
 RETRY_TIME = 600
+BASE_BACKOFF = 2
+MAX_BACKOFF = 600
+MAX_BACKOFF_ATTEMPT = 10
+API_RATE_LIMIT = 30
+API_RATE_PERIOD = 60
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STATE_FILE = 'state.json'
+REQUEST_TIMEOUT = (5, 30)
+MESSAGE_SEPARATOR = '\n\n'
 
 
 HOMEWORK_VERDICTS = {
@@ -34,25 +70,96 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+api_calls = deque(maxlen=API_RATE_LIMIT)
+last_message_hash = None
+api_params = {'from_date': 0}
+stop_event = threading.Event()
+
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    max_retries=Retry(
+        total=1,
+        read=False,
+        status=0,
+        respect_retry_after_header=False,
+    ),
+))
+
 
 def check_tokens() -> bool:
     """Проверяет доступность переменных окружения."""
     return all((PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID))
 
 
+def load_state() -> dict:
+    """Возвращает сохранённые метку времени и статусы домашних работ."""
+    state = {'timestamp': int(time.time()), 'last_statuses': {}}
+    try:
+        with open(STATE_FILE, encoding='utf-8') as file:
+            saved_state = json.load(file)
+        state['timestamp'] = int(saved_state['timestamp'])
+        state['last_statuses'] = {
+            name: status
+            for name, status in saved_state.get('last_statuses', {}).items()
+            if status in HOMEWORK_VERDICTS
+        }
+    except FileNotFoundError:
+        logger.info('Сохранённое состояние не найдено')
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        logger.error('Не удалось прочитать %s: %s', STATE_FILE, error)
+    return state
+
+
+def save_state(timestamp: int, last_statuses: dict) -> None:
+    """Сохраняет метку времени и статусы домашних работ."""
+    temp_file = f'{STATE_FILE}.tmp'
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'timestamp': timestamp, 'last_statuses': last_statuses},
+                file,
+                ensure_ascii=False
+            )
+        os.replace(temp_file, STATE_FILE)
+    except OSError as error:
+        logger.error('Не удалось сохранить %s: %s', STATE_FILE, error)
+
+
+def wait_for_rate_limit() -> bool:
+    """Не даёт превысить допустимую частоту запросов к API.
+
+    Возвращает False, если ожидание прервано остановкой бота.
+    """
+    if len(api_calls) == API_RATE_LIMIT:
+        delay = api_calls[0] + API_RATE_PERIOD - time.monotonic()
+        if delay > 0:
+            logger.info(
+                'Достигнут лимит запросов к API, ожидание %.0f сек.', delay
+            )
+            if stop_event.wait(delay):
+                return False
+    api_calls.append(time.monotonic())
+    return not stop_event.is_set()
+
+
 def get_api_answer(current_timestamp: int) -> dict:
     """Делает запрос к эндпоинту API Практикум.Домашка."""
-    timestamp = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
+    api_params['from_date'] = current_timestamp or int(time.time())
     try:
         logger.info('Отправка запроса к API-сервису')
-        homework_status = requests.get(
+        homework_status = SESSION.get(
             ENDPOINT,
             headers=HEADERS,
-            params=params)
+            params=api_params,
+            timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.Timeout as error:
+        message = f'Превышено время ожидания ответа от API: {error}'
+        logger.error(message)
+        raise Exception(message)
     except Exception as error:
-        message = (f'Ошибка при запросе к основному API: {error}, '
-                   f'{ENDPOINT}, {HEADERS}')
+        message = f'Ошибка при запросе к основному API: {error}, {ENDPOINT}'
         logger.error(message)
         raise Exception(message)
     if homework_status.status_code != HTTPStatus.OK:
@@ -61,7 +168,7 @@ def get_api_answer(current_timestamp: int) -> dict:
         logger.error(message)
         raise Exception(message)
     try:
-        homework_status = homework_status.json()
+        homework_status = orjson.loads(homework_status.content)
     except Exception as error:
         message = f'Ошибка при обработке json-файла: {error}, '
         logger.error(message)
@@ -99,7 +206,7 @@ def check_response(response: dict) -> list:
 
 def parse_status(homework: dict) -> str:
     """Проверяет статус домашней роботы и возвращает расшифровку статуса."""
-    logging.info('Проверка статуса домашней работы')
+    logger.info('Проверка статуса домашней работы')
     if not isinstance(homework, dict):
         message = 'Значение ключа "homeworks" не является словарем'
         logger.error(message)
@@ -113,23 +220,159 @@ def parse_status(homework: dict) -> str:
         logger.error(message)
         raise KeyError(message)
 
-    if homework_status not in HOMEWORK_VERDICTS:
+    verdict = HOMEWORK_VERDICTS.get(homework_status)
+    if verdict is None:
         message = f'Недокументированный статус домашней работы:{homework_name}'
         logger.error(message)
         raise KeyError(message)
-    logging.info('Получен валидный статус работы {}'.format(homework_name))
-    return (f'Изменился статус проверки работы "{homework_name}".'
-            f' {HOMEWORK_VERDICTS[homework_status]}')
+    logger.info('Получен валидный статус работы %s', homework_name)
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
 
+def send_message(bot, message: str) -> bool:
+    """Отправляет сообщение боту в телеграм, если оно не повторяется.
 
-def send_message(bot, message: str) -> None:
-    """Отправляет сообщение боту в телеграм."""
+    Возвращает False, если отправку стоит повторить позже.
+    """
+    global last_message_hash
+    message_hash = hash(message)
+    if message_hash == last_message_hash:
+        logger.debug('Сообщение не изменилось и не отправлено')
+        return True
     try:
         bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-        logging.info('Телеграм бот отправил сообщение в чат')
+        last_message_hash = message_hash
+        logger.info('Телеграм бот отправил сообщение в чат')
+        return True
+    except BadRequest as error:
+        logger.error('Телеграм отклонил сообщение: %s', error)
+        return True
+    except (NetworkError, RetryAfter) as error:
+        logger.error('Сбой в работе телеграм-бота: %s', error)
+        return False
+    except Exception as error:
+        logger.error('Сбой в работе телеграм-бота: %s', error)
+        return True
+
+
+def collect_updates(homeworks: list, last_statuses: dict) -> dict:
+    """Возвращает сообщения об изменившихся статусах домашних работ.
+
+    Для работ, которые не удалось разобрать, статус равен None.
+    """
+    updates = {}
+    for index, homework in enumerate(homeworks):
+        try:
+            message = parse_status(homework)
+        except (TypeError, KeyError) as error:
+            homework_name = (
+                isinstance(homework, dict) and homework.get('homework_name')
+            ) or f'#{index}'
+            updates[homework_name] = (
+                None, f'Не удалось обработать домашнюю работу: {error}'
+            )
+            continue
+        homework_name = homework['homework_name']
+        homework_status = homework['status']
+        if last_statuses.get(homework_name) != homework_status:
+            updates[homework_name] = (homework_status, message)
+    return updates
+
+
+def split_message(parts: list) -> list:
+    """Собирает части в сообщения не длиннее лимита телеграма."""
+    messages = []
+    current = ''
+    for part in parts:
+        for start in range(0, len(part), MAX_MESSAGE_LENGTH):
+            chunk = part[start:start + MAX_MESSAGE_LENGTH]
+            if current and (len(current) + len(MESSAGE_SEPARATOR)
+                            + len(chunk) <= MAX_MESSAGE_LENGTH):
+                current = f'{current}{MESSAGE_SEPARATOR}{chunk}'
+            else:
+                if current:
+                    messages.append(current)
+                current = chunk
+    if current:
+        messages.append(current)
+    return messages
+
+
+def get_backoff_delay(attempt: int) -> float:
+    """Возвращает паузу перед повторным запросом после ошибки."""
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+
+
+def handle_stop_signal(signum, frame) -> None:
+    """Прерывает ожидание проверок при остановке бота по сигналу."""
+    logger.info('Получен сигнал %s, бот останавливается', signum)
+    stop_event.set()
+
+
+def check_homework(context: CallbackContext) -> None:
+    """Проверяет статус домашних работ и планирует следующую проверку."""
+    state = context.bot_data
+    if not wait_for_rate_limit():
+        return
+    try:
+        response = get_api_answer(state['timestamp'])
+        homeworks_list = check_response(response)
+        updates = collect_updates(homeworks_list, state['last_statuses'])
+        if updates:
+            messages = split_message(
+                [text for _, text in updates.values()]
+            )
+        else:
+            messages = ['Статус работы не изменился']
+            logger.debug(messages[0])
+        for message in messages:
+            if not send_message(context.bot, message):
+                raise Exception('Не удалось отправить сообщение в телеграм')
+        state['last_statuses'].update(
+            (name, status) for name, (status, _) in updates.items()
+            if status is not None
+        )
+        state['timestamp'] = response['current_date']
+        save_state(state['timestamp'], state['last_statuses'])
+        state['error_attempt'] = 0
+        delay = RETRY_TIME
+
     except Exception as error:
-        message = f'Сбой в работе телеграм-бота: {error}'
+        message = f'Сбой в работе программы: {error}'
         logger.error(message)
+        send_message(context.bot, message)
+        delay = get_backoff_delay(state['error_attempt'])
+        state['error_attempt'] = min(
+            state['error_attempt'] + 1, MAX_BACKOFF_ATTEMPT
+        )
+        logger.info('Повторный запрос через %.0f сек.', delay)
+
+    if not stop_event.is_set():
+        context.job_queue.run_once(check_homework, delay)
+
+
+def status_command(update: Update, context: CallbackContext) -> None:
+    """Отвечает на команду /status последними известными статусами.
+
+    Показываются только статусы, о которых бот уже сообщал в чат.
+    """
+    last_statuses = list(context.bot_data['last_statuses'].items())
+    if last_statuses:
+        message = '\n'.join(
+            f'"{name}": {HOMEWORK_VERDICTS[status]}'
+            for name, status in last_statuses
+        )
+    else:
+        message = 'Бот ещё не сообщал о статусах домашних работ'
+    update.effective_message.reply_text(message)
+
+
+def get_chat_filter() -> Filters.chat:
+    """Возвращает фильтр сообщений из чата TELEGRAM_CHAT_ID."""
+    chat_id = str(TELEGRAM_CHAT_ID)
+    if chat_id.lstrip('-').isdigit():
+        return Filters.chat(chat_id=int(chat_id))
+    return Filters.chat(username=chat_id)
 
 
 def main():
@@ -139,49 +382,21 @@ def main():
         logger.critical(message)
         sys.exit(message)
 
-    bot = Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    previous_report = {
-        'message_name': '',
-        'output_text': ''
-    }
-    current_report = {
-        'message_name': '',
-        'output_text': ''
-    }
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            current_timestamp = response['current_date']
-            homeworks_list = check_response(response)
-            if homeworks_list:
-                verdict = parse_status(homeworks_list[0])
-                current_report['message_name'] = verdict.split()[4]
-                current_report['output_text'] = verdict
-            else:
-                message = 'Статус работы не изменился'
-                logger.debug(message)
-                current_report['output_text'] = message
-
-            if current_report != previous_report:
-                send_message(bot, current_report['output_text'])
-                previous_report = current_report.copy()
-            else:
-                logger.debug(
-                    'Статус работы не изменился, сообщение не отправлено'
-                )
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            current_report['name_message'] = 'Error'
-            current_report['output_text'] = message
-            if current_report != previous_report:
-                send_message(bot, current_report['output_text'])
-                previous_report = current_report.copy()
-
-        finally:
-            time.sleep(RETRY_TIME)
+    updater = Updater(token=TELEGRAM_TOKEN)
+    updater.dispatcher.bot_data.update(load_state(), error_attempt=0)
+    updater.dispatcher.add_handler(CommandHandler(
+        'status',
+        status_command,
+        filters=get_chat_filter(),
+    ))
+    signal.signal(signal.SIGINT, handle_stop_signal)
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+
+    updater.job_queue.run_once(check_homework, 0)
+    updater.start_polling()
+    stop_event.wait()
+    updater.stop()
+    logger.info('Бот остановлен')
 
 
 if __name__ == '__main__':
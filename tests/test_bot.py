@@ -1,7 +1,10 @@
+import json
+import logging
 import os
+import socket
 from http import HTTPStatus
+from types import SimpleNamespace
 
-import requests
 import telegram
 import utils
 
@@ -52,6 +55,10 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
 
 class MockTelegramBot:
 
@@ -186,7 +193,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -232,7 +239,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_500_response_get)
 
         import homework
 
@@ -315,7 +322,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -352,7 +359,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -400,7 +407,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -448,7 +455,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -484,7 +491,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_no_homeworks_response_get)
 
         import homework
 
@@ -525,7 +532,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -565,7 +572,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -599,7 +606,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_empty_response_get)
 
         import homework
 
@@ -626,7 +633,7 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr('homework.SESSION.get', mock_response_get)
 
         import homework
 
@@ -640,3 +647,346 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_backoff_delay(self):
+        import homework
+
+        func_name = 'get_backoff_delay'
+        utils.check_function(homework, func_name, 1)
+        for attempt in range(homework.MAX_BACKOFF_ATTEMPT + 1):
+            delay = homework.get_backoff_delay(attempt)
+            assert 0 <= delay <= min(
+                homework.MAX_BACKOFF, homework.BASE_BACKOFF * 2 ** attempt
+            ), (
+                f'Проверьте, что функция `{func_name}` возвращает паузу '
+                'в пределах экспоненциально растущего окна'
+            )
+
+    def test_wait_for_rate_limit(self, monkeypatch):
+        import homework
+
+        func_name = 'wait_for_rate_limit'
+        utils.check_function(homework, func_name, 0)
+        delays = []
+        monkeypatch.setattr(homework.stop_event, 'wait', delays.append)
+        monkeypatch.setattr(homework, 'api_calls', homework.deque(
+            maxlen=homework.API_RATE_LIMIT
+        ))
+        for _ in range(homework.API_RATE_LIMIT):
+            assert homework.wait_for_rate_limit(), (
+                f'Проверьте, что функция `{func_name}` возвращает True, '
+                'если запрос к API можно выполнять'
+            )
+        assert not delays, (
+            f'Проверьте, что функция `{func_name}` не делает паузу, '
+            'пока лимит запросов не исчерпан'
+        )
+        homework.wait_for_rate_limit()
+        assert len(delays) == 1 and delays[0] > 0, (
+            f'Проверьте, что функция `{func_name}` делает паузу '
+            'при превышении лимита запросов'
+        )
+        monkeypatch.setattr(homework.stop_event, 'wait', lambda delay: True)
+        assert not homework.wait_for_rate_limit(), (
+            f'Проверьте, что функция `{func_name}` возвращает False, '
+            'если ожидание прервано остановкой бота'
+        )
+
+    def test_save_and_load_state(self, monkeypatch, tmp_path,
+                                 random_timestamp):
+        import homework
+
+        utils.check_function(homework, 'save_state', 2)
+        utils.check_function(homework, 'load_state', 0)
+        monkeypatch.setattr(
+            homework, 'STATE_FILE', str(tmp_path / 'state.json')
+        )
+        state = homework.load_state()
+        assert isinstance(state['timestamp'], int), (
+            'Проверьте, что при отсутствии файла состояния функция '
+            '`load_state` возвращает текущее время'
+        )
+        assert state['last_statuses'] == {}, (
+            'Проверьте, что при отсутствии файла состояния функция '
+            '`load_state` возвращает пустой словарь статусов'
+        )
+        homework.save_state(random_timestamp, {'hw123': 'approved'})
+        assert homework.load_state() == {
+            'timestamp': random_timestamp,
+            'last_statuses': {'hw123': 'approved'},
+        }, (
+            'Проверьте, что функция `load_state` возвращает метку '
+            'времени и статусы, сохранённые функцией `save_state`'
+        )
+        homework.save_state(
+            random_timestamp, {'hw123': 'approved', 'hw456': 'unknown'}
+        )
+        assert homework.load_state()['last_statuses'] == {
+            'hw123': 'approved'
+        }, (
+            'Проверьте, что функция `load_state` отбрасывает '
+            'недокументированные статусы из файла состояния'
+        )
+
+    def test_get_api_answer_read_timeout(self, monkeypatch, caplog,
+                                         current_timestamp):
+        import homework
+
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        host, port = server.getsockname()
+        monkeypatch.setattr(
+            homework, 'ENDPOINT', f'http://{host}:{port}/'
+        )
+        monkeypatch.setattr(homework, 'REQUEST_TIMEOUT', (1, 0.2))
+        monkeypatch.setitem(
+            homework.SESSION.adapters, 'http://',
+            homework.SESSION.get_adapter('https://')
+        )
+
+        func_name = 'get_api_answer'
+        try:
+            with caplog.at_level(logging.ERROR):
+                homework.get_api_answer(current_timestamp)
+        except Exception:
+            pass
+        else:
+            assert False, (
+                f'Убедитесь, что в функции `{func_name}` обрабатываете '
+                'ситуацию, когда API не отвечает дольше таймаута'
+            )
+        finally:
+            server.close()
+        assert 'Превышено время ожидания ответа от API' in caplog.text, (
+            f'Убедитесь, что функция `{func_name}` отдельно обрабатывает '
+            'превышение времени ожидания ответа от API'
+        )
+
+    def test_send_message_skips_duplicates(self, monkeypatch,
+                                           random_timestamp):
+        import homework
+
+        sent = []
+
+        class CountingBot(MockTelegramBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                sent.append(text)
+                return super().send_message(chat_id=chat_id, text=text)
+
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'last_message_hash', None)
+        bot = CountingBot(token='1234:abcdefg')
+        message = f'Сообщение {random_timestamp}'
+        homework.send_message(bot, message)
+        homework.send_message(bot, message)
+        assert sent == [message], (
+            'Убедитесь, что функция `send_message` не отправляет '
+            'повторно то же самое сообщение'
+        )
+        homework.send_message(bot, 'Другое сообщение')
+        assert len(sent) == 2, (
+            'Убедитесь, что функция `send_message` отправляет '
+            'изменившееся сообщение'
+        )
+
+    def test_collect_updates(self):
+        import homework
+
+        func_name = 'collect_updates'
+        utils.check_function(homework, func_name, 2)
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'reviewing'},
+        ]
+        updates = homework.collect_updates(homeworks, {'hw1': 'approved'})
+        assert list(updates) == ['hw2'], (
+            f'Убедитесь, что функция `{func_name}` возвращает все '
+            'домашние работы с изменившимся статусом, кроме уже '
+            'отправленных'
+        )
+        status, message = updates['hw2']
+        assert status == 'reviewing' and message.endswith(
+            self.HOMEWORK_STATUSES['reviewing']
+        ), (
+            f'Проверьте, что функция `{func_name}` возвращает статус '
+            'и сообщение для каждой домашней работы'
+        )
+
+    def test_check_homework_schedules_next_poll(self, monkeypatch, tmp_path,
+                                                random_timestamp):
+        import homework
+
+        func_name = 'check_homework'
+        utils.check_function(homework, func_name, 1)
+        monkeypatch.setattr(
+            homework, 'STATE_FILE', str(tmp_path / 'state.json')
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'get_api_answer', lambda timestamp: {
+            'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+            'current_date': random_timestamp,
+        })
+        scheduled = []
+
+        class MockJobQueue:
+            def run_once(self, callback, when):
+                scheduled.append((callback, when))
+
+        context = SimpleNamespace(
+            bot=MockTelegramBot(token='1234:abcdefg'),
+            bot_data={'timestamp': 0, 'last_statuses': {},
+                      'error_attempt': 0},
+            job_queue=MockJobQueue(),
+        )
+        homework.check_homework(context)
+        assert context.bot_data['timestamp'] == random_timestamp, (
+            f'Проверьте, что функция `{func_name}` сохраняет `current_date` '
+            'из ответа API'
+        )
+        assert context.bot_data['last_statuses'] == {'hw123': 'approved'}, (
+            f'Проверьте, что функция `{func_name}` запоминает '
+            'отправленные статусы домашних работ'
+        )
+        assert scheduled == [(homework.check_homework, homework.RETRY_TIME)], (
+            f'Проверьте, что функция `{func_name}` планирует следующую '
+            'проверку через `RETRY_TIME`'
+        )
+
+    def test_check_homework_keeps_state_on_failed_send(self, monkeypatch,
+                                                       tmp_path,
+                                                       random_timestamp):
+        import homework
+
+        func_name = 'check_homework'
+        state_file = tmp_path / 'state.json'
+        monkeypatch.setattr(homework, 'STATE_FILE', str(state_file))
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'last_message_hash', None)
+        monkeypatch.setattr(homework, 'get_api_answer', lambda timestamp: {
+            'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+            'current_date': random_timestamp,
+        })
+
+        class FailingBot(MockTelegramBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                raise telegram.error.NetworkError('Telegram недоступен')
+
+        scheduled = []
+
+        class MockJobQueue:
+            def run_once(self, callback, when):
+                scheduled.append(when)
+
+        context = SimpleNamespace(
+            bot=FailingBot(token='1234:abcdefg'),
+            bot_data={'timestamp': 0, 'last_statuses': {},
+                      'error_attempt': 0},
+            job_queue=MockJobQueue(),
+        )
+        homework.check_homework(context)
+        assert context.bot_data['timestamp'] == 0, (
+            f'Убедитесь, что функция `{func_name}` не сдвигает метку '
+            'времени, если сообщение не удалось отправить'
+        )
+        assert context.bot_data['last_statuses'] == {}, (
+            f'Убедитесь, что функция `{func_name}` не запоминает статусы, '
+            'если сообщение не удалось отправить'
+        )
+        assert not state_file.exists(), (
+            f'Убедитесь, что функция `{func_name}` не сохраняет метку '
+            'времени, если сообщение не удалось отправить'
+        )
+        assert scheduled and scheduled[0] <= homework.BASE_BACKOFF, (
+            f'Проверьте, что функция `{func_name}` повторяет проверку '
+            'с экспоненциальной задержкой после ошибки отправки'
+        )
+
+    def test_get_chat_filter(self, monkeypatch):
+        import homework
+
+        func_name = 'get_chat_filter'
+        utils.check_function(homework, func_name, 0)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '-10012345')
+        assert homework.get_chat_filter().chat_ids == {-10012345}, (
+            f'Проверьте, что функция `{func_name}` фильтрует чат '
+            'по числовому идентификатору'
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '@channel')
+        assert homework.get_chat_filter().usernames == {'channel'}, (
+            f'Проверьте, что функция `{func_name}` фильтрует чат '
+            'по имени вида `@channel`'
+        )
+
+    def test_check_homework_reports_valid_homework_next_to_bad_one(
+            self, monkeypatch, tmp_path, random_timestamp):
+        import homework
+
+        func_name = 'check_homework'
+        monkeypatch.setattr(
+            homework, 'STATE_FILE', str(tmp_path / 'state.json')
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'last_message_hash', None)
+        monkeypatch.setattr(homework, 'get_api_answer', lambda timestamp: {
+            'homeworks': [
+                {'homework_name': 'good', 'status': 'approved'},
+                {'homework_name': 'bad', 'status': 'unknown'},
+            ],
+            'current_date': random_timestamp,
+        })
+        sent = []
+
+        class CountingBot(MockTelegramBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                sent.append(text)
+
+        context = SimpleNamespace(
+            bot=CountingBot(token='1234:abcdefg'),
+            bot_data={'timestamp': 0, 'last_statuses': {},
+                      'error_attempt': 0},
+            job_queue=SimpleNamespace(run_once=lambda callback, when: None),
+        )
+        homework.check_homework(context)
+        assert len(sent) == 1 and self.HOMEWORK_STATUSES['approved'] in (
+            sent[0]
+        ), (
+            f'Убедитесь, что функция `{func_name}` сообщает о корректной '
+            'домашней работе, даже если другая имеет недокументированный '
+            'статус'
+        )
+        assert 'bad' in sent[0], (
+            f'Убедитесь, что функция `{func_name}` сообщает о домашней '
+            'работе, которую не удалось обработать'
+        )
+        assert context.bot_data['timestamp'] == random_timestamp, (
+            f'Убедитесь, что функция `{func_name}` сдвигает метку времени, '
+            'даже если одну из домашних работ не удалось обработать'
+        )
+        assert context.bot_data['last_statuses'] == {'good': 'approved'}, (
+            f'Убедитесь, что функция `{func_name}` запоминает только '
+            'корректные статусы домашних работ'
+        )
+
+    def test_split_message(self):
+        import homework
+
+        func_name = 'split_message'
+        utils.check_function(homework, func_name, 1)
+        limit = telegram.constants.MAX_MESSAGE_LENGTH
+        assert homework.split_message(['a', 'b']) == ['a\n\nb'], (
+            f'Проверьте, что функция `{func_name}` объединяет короткие '
+            'части в одно сообщение'
+        )
+        messages = homework.split_message(['a' * (limit - 1), 'b' * limit,
+                                           'c' * (limit + 1)])
+        assert all(len(message) <= limit for message in messages), (
+            f'Проверьте, что функция `{func_name}` не возвращает сообщения '
+            'длиннее лимита телеграма'
+        )
+        assert ''.join(messages).replace('\n', '') == (
+            'a' * (limit - 1) + 'b' * limit + 'c' * (limit + 1)
+        ), (
+            f'Проверьте, что функция `{func_name}` не теряет текст '
+            'при разбиении'
+        )